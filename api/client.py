@@ -0,0 +1,145 @@
+"""
+Client for api.server, used by main.py when HABITS_API_URL is set.
+
+The sidebar is built from /meta, and KPIs and chart aggregates come
+pre-computed from the server for the current filters; /records is only
+downloaded after the KPI row, for the calendar, heatmap, correlation and data tab.
+
+Responses are kept in memory with their ETag and revalidated with
+If-None-Match, so an unchanged dataset costs one 304 per call and the
+decoded DataFrames are reused as-is. Only the CLIENT_CACHE_SIZE most recently
+used URLs are kept.
+"""
+import datetime
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+
+import pandas as pd
+
+REQUEST_TIMEOUT = 10
+# Most recently used responses kept for revalidation (one per URL, i.e. per filter selection)
+CLIENT_CACHE_SIZE = 64
+# Nullable numeric columns (JSON null -> NaN)
+FLOAT_COLUMNS = ('score', 'mean', 'ma_7d')
+
+# url -> (etag, decoded value), least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _get_json(url, decode):
+    with _cache_lock:
+        cached = _cache.get(url)
+        if cached is not None:
+            _cache.move_to_end(url)
+
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+    if cached is not None:
+        request.add_header('If-None-Match', cached[0])
+
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            body = response.read()
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            value = decode(json.loads(body))
+            etag = response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached is not None:
+            return cached[1]
+        raise
+
+    if etag:
+        with _cache_lock:
+            _cache[url] = (etag, value)
+            _cache.move_to_end(url)
+            while len(_cache) > CLIENT_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return value
+
+def decode_frame(payload):
+    """
+    Inverse of api.server.encode_frame.
+    """
+    df = pd.DataFrame(payload['data'], columns=payload['columns'])
+    for col in ('date', 'period'):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(float)
+    return df
+
+def _url(base_url, path, start=None, end=None, types=None, habits=None, **params):
+    query = dict(params)
+    if start is not None:
+        query['start'] = start.isoformat()
+    if end is not None:
+        query['end'] = end.isoformat()
+    # Repeated parameters (types=a&types=b): names are free text and may contain commas
+    if types is not None:
+        query['types'] = list(types)
+    if habits is not None:
+        query['habits'] = list(habits)
+    url = f"{base_url.rstrip('/')}{path}"
+    return f"{url}?{urllib.parse.urlencode(sorted(query.items()), doseq=True)}" if query else url
+
+def _decode_meta(payload):
+    return {
+        'min_date': datetime.date.fromisoformat(payload['min_date']),
+        'max_date': datetime.date.fromisoformat(payload['max_date']),
+        'types': payload['types'],
+        'habits': decode_frame(payload['habits']),
+    }
+
+def fetch_meta(base_url):
+    """
+    What the sidebar filters need (date bounds, categories, (type, habit) pairs),
+    without downloading the rows. None if the API is unreachable.
+    """
+    try:
+        return _get_json(_url(base_url, '/meta'), _decode_meta)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"CRITICAL ERROR: API unavailable at {base_url}: {e}")
+        return None
+
+def fetch_records(base_url):
+    """
+    Processed rows (same as etl.processor.process_data), or None if the API is unreachable.
+    """
+    try:
+        return _get_json(_url(base_url, '/records'), decode_frame)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"CRITICAL ERROR: API unavailable at {base_url}: {e}")
+        return None
+
+def fetch_kpis(base_url, **filters):
+    """
+    Same dict as interface.kpis.calculate_global_metrics for the given filters
+    (start, end, types, habits), or None if the API is unreachable.
+    """
+    try:
+        return _get_json(_url(base_url, '/kpis', **filters), lambda payload: payload)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"CRITICAL ERROR: API unavailable at {base_url}: {e}")
+        return None
+
+def fetch_chart_data(base_url, **filters):
+    """
+    Same dict as interface.kpis.chart_aggregates for the given filters,
+    or None if the API is unreachable.
+    """
+    try:
+        return {
+            'trend': _get_json(_url(base_url, '/charts/trend', **filters), decode_frame),
+            'trend_by_type': _get_json(_url(base_url, '/charts/trend', dimension='type', **filters), decode_frame),
+            'category': _get_json(_url(base_url, '/charts/category', **filters), decode_frame),
+            'day_of_week': _get_json(_url(base_url, '/charts/day-of-week', **filters), decode_frame),
+        }
+    except (urllib.error.URLError, OSError) as e:
+        print(f"CRITICAL ERROR: API unavailable at {base_url}: {e}")
+        return None
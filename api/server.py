@@ -0,0 +1,352 @@
+"""
+Local aggregate API.
+
+One process owns the ETL output (etl.pipeline.load_pipeline) and serves KPIs,
+chart aggregates and the processed tables to any number of consumers
+(Streamlit sessions via api.client, phone widgets, scripts).
+
+- Data is reloaded from Sheets in the background every SNAPSHOT_MAX_AGE seconds
+  (the on-disk snapshot is only used for the first load); requests never
+  trigger a Sheets fetch.
+- Every response carries an ETag derived from the data version and the request,
+  so `If-None-Match` is answered with 304 without computing anything.
+- Computed bodies are cached per (version, request), so N consumers asking the
+  same thing cost one computation.
+- JSON is columnar ({"columns": [...], "data": [[...]]}) and gzipped on request.
+
+Usage:
+    python -m api.server --host 127.0.0.1 --port 8765
+
+Endpoints (filters: start, end as YYYY-MM-DD; types, habits repeated, e.g. types=Health&types=Work):
+    GET /health
+    GET /meta
+    GET /kpis
+    GET /charts/trend          (+ dimension=type for one line per category)
+    GET /charts/category
+    GET /charts/day-of-week
+    GET /rollups               all tables, unfiltered
+    GET /rollups/<grain>/<dimension>
+    GET /records               processed rows (used by api.client)
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+from etl.pipeline import load_pipeline
+from etl.processor import ROLLUP_GRAINS, ROLLUP_DIMENSIONS, query_rollup
+from etl.snapshot import SNAPSHOT_MAX_AGE
+from interface.kpis import calculate_global_metrics, trend_series, category_stats, day_of_week_stats
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 256
+GZIP_MIN_BYTES = 1024
+# Query parameters that may be repeated; every other parameter keeps its last value
+LIST_PARAMS = ('types', 'habits')
+
+# --- SERIALIZATION ---
+
+def _json_default(value):
+    # Dates left in object columns (pd.Timestamp is a datetime subclass)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # numpy scalars (np.int64, np.float64...) coming out of pandas
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def encode_frame(df):
+    """
+    Columnar payload: dates as YYYY-MM-DD, NaN as null.
+    """
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%d')
+    out = out.astype(object).where(out.notna(), None)
+    return {'columns': list(out.columns), 'data': out.to_numpy().tolist()}
+
+def _clean_number(value):
+    # NaN is not valid JSON
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+# --- DATA STORE ---
+
+class AggregateStore:
+    """
+    Holds the current (df, rollups) and a cache of encoded responses.
+    State is replaced atomically on refresh; readers never see a half-built version.
+    """
+
+    def __init__(self, loader=load_pipeline, refresh_interval=SNAPSHOT_MAX_AGE):
+        self._loader = loader
+        self._refresh_interval = refresh_interval
+        self._state = None
+        self._refresh_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._responses = OrderedDict()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+
+    @property
+    def state(self):
+        return self._state
+
+    def refresh(self, max_age=SNAPSHOT_MAX_AGE):
+        """
+        Reloads the pipeline. Concurrent calls collapse into one.
+        max_age is passed to load_pipeline: 0 skips the on-disk snapshot.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            df, rollups, _ = self._loader(max_age=max_age)
+            if df is None or df.empty:
+                print("✕ Warning: pipeline returned no data, keeping previous version.")
+                return
+
+            version = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()[:16]
+            if self._state is not None and self._state['version'] == version:
+                self._state = dict(self._state, loaded_at=time.time())
+                return
+
+            self._state = {'df': df, 'rollups': rollups, 'version': version, 'loaded_at': time.time()}
+            with self._cache_lock:
+                self._responses.clear()
+            print(f"✓ Data version {version} ({len(df)} rows)")
+        except Exception as e:
+            print(f"✕ Refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def start_background_refresh(self):
+        def _loop():
+            while not self._stop.wait(self._refresh_interval):
+                # Always go to Sheets: the snapshot may be our own hour-old data
+                self.refresh(max_age=0)
+
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=_loop, name='aggregate-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self, timeout=None):
+        """
+        Stops the refresh loop, waiting for a reload in progress to finish.
+        """
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            self._refresh_thread = None
+
+    def etag(self, key, state=None):
+        state = state or self._state
+        if state is None:
+            return None
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        return f'"{state["version"]}-{digest}"'
+
+    def response(self, key, compute):
+        """
+        Returns (etag, body, gzipped_body), computing and caching on a miss.
+        """
+        state = self._state
+        cache_key = (state['version'], key)
+
+        with self._cache_lock:
+            cached = self._responses.get(cache_key)
+            if cached is not None:
+                self._responses.move_to_end(cache_key)
+                return cached
+
+        body = json.dumps(compute(state), separators=(',', ':'), default=_json_default).encode('utf-8')
+        gzipped = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+        entry = (self.etag(key, state), body, gzipped)
+
+        with self._cache_lock:
+            self._responses[cache_key] = entry
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return entry
+
+# --- ENDPOINTS ---
+
+def _parse_filters(state, query):
+    df = state['df']
+    types = query.get('types')
+    habits = query.get('habits')
+    return {
+        'start': query.get('start') or df['date'].min(),
+        'end': query.get('end') or df['date'].max(),
+        'types': list(types) if types else None,
+        'habits': list(habits) if habits else None,
+    }
+
+def _filtered_rollup(state, query, grain):
+    # Category rollups unless the request narrows down to specific habits (same rule as main.py)
+    filters = _parse_filters(state, query)
+    dimension = 'habit' if filters['habits'] is not None else 'type'
+    return query_rollup(state['rollups'], grain, dimension, **filters)
+
+def _meta(state, query):
+    df = state['df']
+    habits = df[['type', 'habit']].drop_duplicates().sort_values(['type', 'habit'])
+    return {
+        'version': state['version'],
+        'min_date': df['date'].min().strftime('%Y-%m-%d'),
+        'max_date': df['date'].max().strftime('%Y-%m-%d'),
+        'types': sorted(df['type'].unique()),
+        'habits': encode_frame(habits),
+    }
+
+def _kpis(state, query):
+    metrics = calculate_global_metrics(
+        _filtered_rollup(state, query, 'day'),
+        _filtered_rollup(state, query, 'month')
+    )
+    return {key: _clean_number(v.item() if hasattr(v, 'item') else v) for key, v in metrics.items()}
+
+def _trend(state, query):
+    dimension = 'type' if query.get('dimension') == 'type' else None
+    return encode_frame(trend_series(_filtered_rollup(state, query, 'day'), dimension=dimension))
+
+def _category(state, query):
+    return encode_frame(category_stats(_filtered_rollup(state, query, 'month')))
+
+def _day_of_week(state, query):
+    return encode_frame(day_of_week_stats(_filtered_rollup(state, query, 'day')))
+
+def _all_rollups(state, query):
+    return {f"{grain}/{dimension}": encode_frame(table) for (grain, dimension), table in state['rollups'].items()}
+
+def _records(state, query):
+    return encode_frame(state['df'])
+
+ROUTES = {
+    '/meta': _meta,
+    '/kpis': _kpis,
+    '/charts/trend': _trend,
+    '/charts/category': _category,
+    '/charts/day-of-week': _day_of_week,
+    '/rollups': _all_rollups,
+    '/records': _records,
+}
+
+def _resolve(path):
+    if path in ROUTES:
+        return ROUTES[path]
+
+    parts = path.strip('/').split('/')
+    if len(parts) == 3 and parts[0] == 'rollups' and parts[1] in ROLLUP_GRAINS and parts[2] in ROLLUP_DIMENSIONS:
+        grain, dimension = parts[1], parts[2]
+
+        def _single_rollup(state, query):
+            filters = _parse_filters(state, query)
+            return encode_frame(query_rollup(state['rollups'], grain, dimension, **filters))
+        return _single_rollup
+    return None
+
+class AggregateRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'HabitTrackerAPI/1.0'
+    protocol_version = 'HTTP/1.1'  # keep-alive for polling clients
+    store = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+
+        if path == '/health':
+            state = self.store.state
+            return self._send_json(200, {'status': 'ok' if state else 'loading'})
+
+        handler = _resolve(path)
+        if handler is None:
+            return self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+        if self.store.state is None:
+            return self._send_json(503, {'error': 'Data not loaded yet'})
+
+        query = {k: tuple(v) if k in LIST_PARAMS else v[-1] for k, v in parse_qs(url.query).items()}
+        key = (path, tuple(sorted(query.items())))
+
+        etag = self.store.etag(key)
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        try:
+            etag, body, gzipped = self.store.response(key, lambda state: handler(state, query))
+        except (ValueError, KeyError) as e:
+            return self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            print(f"✕ Error on {self.path}: {e!r}")
+            return self._send_json(500, {'error': f"Internal error: {type(e).__name__}"})
+
+        use_gzip = gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        payload = gzipped if use_gzip else body
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status, obj):
+        body = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Polling clients would flood stdout otherwise
+        pass
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, store=None):
+    store = store or AggregateStore()
+    handler = type('BoundAggregateRequestHandler', (AggregateRequestHandler,), {'store': store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve habit KPIs and chart aggregates over HTTP.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    store = AggregateStore()
+    store.refresh()
+    store.start_background_refresh()
+
+    server = create_server(args.host, args.port, store)
+    print(f"--- Habit Tracker API on http://{args.host}:{args.port} ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop_background_refresh()
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
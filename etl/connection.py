@@ -1,5 +1,3 @@
-import gspread
-import pandas as pd
 from pathlib import Path
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
@@ -12,38 +10,72 @@ SPREADSHEET_NAME = "habits-2025"
 # Ordem cronológica é importante aqui
 MONTHLY_SHEETS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "ago", "set", "out", "nov", "dez"]
 
-def get_gspread_client():
+def get_client_manager():
+    """
+    Gerenciador de vida longa (credenciais, token, sessão HTTP, cache de IDs),
+    criado uma vez por processo e reutilizado em todas as cargas.
+    """
+    # Import tardio: gspread (e a pilha de auth) só é carregado quando realmente
+    # precisamos falar com a API, não no import do módulo.
+    from etl.sheets_client import get_client_manager as _get_manager
+
     if not CREDENTIALS_FILE.exists():
         raise FileNotFoundError(f"Credentials file not found at: {CREDENTIALS_FILE}")
-    return gspread.service_account(filename=str(CREDENTIALS_FILE))
+    return _get_manager(CREDENTIALS_FILE)
 
-def load_raw_data():
+def get_gspread_client():
+    return get_client_manager().client
+
+def _values_to_frame(values):
+    """
+    Mesma conversão do worksheet.get_all_records(): 1ª linha = cabeçalho,
+    linhas completadas com '' e valores numericizados.
+    """
+    from gspread.utils import numericise_all
+    import pandas as pd
+
+    if not values or len(values) < 2:
+        return None
+
+    header = values[0]
+    duplicates = sorted({h for h in header if header.count(h) > 1})
+    if duplicates:
+        raise ValueError(f"the header row in the worksheet contains duplicates: {duplicates}")
+
+    width = len(header)
+    rows = [numericise_all((row + [''] * width)[:width]) for row in values[1:]]
+    return pd.DataFrame(rows, columns=header)
+
+def load_raw_data(spreadsheet_name=SPREADSHEET_NAME):
     """
     Retorna uma LISTA de DataFrames brutos, um para cada aba.
     Não tenta concatenar nada ainda.
+    Todas as abas vêm numa única requisição (values_batch_get); ID e abas da
+    planilha ficam em cache no SheetsClientManager do processo, então dá para
+    chamar para várias planilhas em sequência sem repetir auth nem metadata.
     """
-    print(f"--- Connecting to Google Sheets: {SPREADSHEET_NAME} ---")
+    print(f"--- Connecting to Google Sheets: {spreadsheet_name} ---")
     
     try:
-        client = get_gspread_client()
-        sh = client.open(SPREADSHEET_NAME)
+        manager = get_client_manager()
+        sheet_values = manager.batch_get(spreadsheet_name, MONTHLY_SHEETS)
+
+        for sheet_name in MONTHLY_SHEETS:
+            if sheet_name not in sheet_values:
+                print(f"✕ Aviso: Aba '{sheet_name}' não encontrada.")
         
         raw_datasets = []
 
-        for sheet_name in MONTHLY_SHEETS:
+        for sheet_name, values in sheet_values.items():
             try:
-                worksheet = sh.worksheet(sheet_name)
-                data = worksheet.get_all_records()
+                df = _values_to_frame(values)
                 
-                if data:
-                    df = pd.DataFrame(data)
+                if df is not None:
                     # Opcional: Marcar a origem dos dados caso precise debugar
                     # df['_origin_sheet'] = sheet_name 
                     raw_datasets.append(df)
                     print(f"✓ Baixado: {sheet_name} ({len(df)} linhas)")
                 
-            except gspread.WorksheetNotFound:
-                print(f"✕ Aviso: Aba '{sheet_name}' não encontrada.")
             except Exception as e:
                 print(f"✕ Erro na aba '{sheet_name}': {e}")
 
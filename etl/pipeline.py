@@ -0,0 +1,32 @@
+import time
+
+from etl.connection import load_raw_data
+from etl.processor import process_data, refresh_rollups
+from etl.snapshot import SNAPSHOT_MAX_AGE, snapshot_age, load_snapshot, save_snapshot, load_rollups, save_rollups
+
+def load_pipeline(max_age=SNAPSHOT_MAX_AGE):
+    """
+    Pipeline completo: snapshot em disco (se mais novo que max_age) ou
+    Sheets -> process_data, e em seguida as rollups atualizadas de forma incremental.
+    max_age=0 ignora o snapshot e força a leitura do Sheets.
+    Retorna (df, rollups, loaded_at), ou (None, None, None) se não houver dados.
+    loaded_at é o momento em que os dados saíram do Sheets, não o da leitura do disco.
+    """
+    # Fast path: um snapshot recente pula gspread/auth inteiramente
+    age = snapshot_age()
+    df_processed = load_snapshot(max_age)
+
+    if df_processed is not None:
+        loaded_at = time.time() - age
+    else:
+        raw_list = load_raw_data()
+        if not raw_list:
+            return None, None, None
+        df_processed = process_data(raw_list)
+        save_snapshot(df_processed)
+        loaded_at = time.time()
+
+    # Rollups são atualizadas a partir da última versão salva (só os dias alterados)
+    rollups, fingerprints = refresh_rollups(*load_rollups(), df_processed)
+    save_rollups(rollups, fingerprints)
+    return df_processed, rollups, loaded_at
@@ -73,4 +73,188 @@ def process_data(raw_data_list):
     # Selecionar apenas colunas úteis
     final_cols = ['date', 'type', 'habit', 'status', 'score', 'month_name', 'day_of_week']
     
-    return full_df[final_cols]
\ No newline at end of file
+    return full_df[final_cols]
+
+# --- ROLLUPS (Tabelas pré-agregadas) ---
+# Guardamos CONTAGENS (hits/misses/rests) e não médias: contagens são somáveis,
+# então qualquer combinação de filtros recompõe a taxa de sucesso exata
+# (hits / (hits + misses)) sem voltar às linhas brutas.
+ROLLUP_GRAINS = ['day', 'week', 'month']
+ROLLUP_DIMENSIONS = ['type', 'habit']
+ROLLUP_COUNTS = ['hits', 'misses', 'rests']
+
+def _rollup_keys(dimension):
+    return ['period', 'type'] if dimension == 'type' else ['period', 'type', 'habit']
+
+def _period_start(dates, grain):
+    """
+    Início do período de cada data: o próprio dia, a segunda-feira da
+    semana ISO ou o dia 1 do mês.
+    """
+    dates = dates.dt.normalize()
+    if grain == 'day':
+        return dates
+    if grain == 'week':
+        return dates - pd.to_timedelta(dates.dt.dayofweek, unit='D')
+    return dates.dt.to_period('M').dt.to_timestamp()
+
+def _period_end(starts, grain):
+    if grain == 'day':
+        return starts
+    if grain == 'week':
+        return starts + pd.Timedelta(days=6)
+    return starts + pd.offsets.MonthEnd(0)
+
+def _daily_habit_counts(df):
+    """
+    Grão mais fino: uma linha por (dia, hábito).
+    Tudo que não é '1' nem '0' conta como rest (igual ao score = NaN).
+    """
+    counts = pd.DataFrame({
+        'period': df['date'].dt.normalize(),
+        'type': df['type'],
+        'habit': df['habit'],
+        'hits': (df['status'] == '1').astype(int),
+        'misses': (df['status'] == '0').astype(int),
+    })
+    counts['rests'] = 1 - counts['hits'] - counts['misses']
+    return counts.groupby(_rollup_keys('habit'), as_index=False)[ROLLUP_COUNTS].sum()
+
+def _aggregate(rollup, grain, dimension):
+    """
+    Reagrega uma tabela de contagens para um grão/dimensão mais grossos.
+    """
+    if rollup.empty:
+        # Vazio mas tipado: um DataFrame(columns=...) vira object no concat
+        return rollup[_rollup_keys(dimension) + ROLLUP_COUNTS].head(0).reset_index(drop=True)
+    base = rollup.assign(period=_period_start(rollup['period'], grain))
+    return base.groupby(_rollup_keys(dimension), as_index=False)[ROLLUP_COUNTS].sum()
+
+def build_rollups(df):
+    """
+    Constrói todas as rollups a partir do DataFrame processado.
+    Retorna um dict {(grain, dimension): DataFrame} com as colunas
+    period, type, [habit], hits, misses, rests.
+    """
+    daily_habit = _daily_habit_counts(df)
+
+    rollups = {}
+    for grain in ROLLUP_GRAINS:
+        for dimension in ROLLUP_DIMENSIONS:
+            if (grain, dimension) == ('day', 'habit'):
+                rollups[(grain, dimension)] = daily_habit
+            else:
+                rollups[(grain, dimension)] = _aggregate(daily_habit, grain, dimension)
+    return rollups
+
+def update_rollups(rollups, df_new):
+    """
+    Atualização incremental: substitui os dias presentes em df_new e
+    recalcula apenas as semanas/meses que contêm esses dias.
+    df_new deve trazer TODAS as linhas de cada dia que contém.
+    """
+    if df_new.empty:
+        return rollups
+
+    fresh = _daily_habit_counts(df_new)
+    fresh_days = fresh['period'].unique()
+
+    old_daily = rollups[('day', 'habit')]
+    daily_habit = pd.concat(
+        [old_daily[~old_daily['period'].isin(fresh_days)], fresh],
+        ignore_index=True
+    ).sort_values(_rollup_keys('habit'), ignore_index=True)
+
+    updated = {('day', 'habit'): daily_habit}
+    for grain in ROLLUP_GRAINS:
+        touched = _period_start(fresh['period'], grain).unique()
+        # Só os dias a partir do primeiro período afetado podem cair nele
+        candidates = daily_habit[daily_habit['period'] >= touched.min()]
+        source = candidates[_period_start(candidates['period'], grain).isin(touched)]
+
+        for dimension in ROLLUP_DIMENSIONS:
+            if (grain, dimension) == ('day', 'habit'):
+                continue
+            old = rollups[(grain, dimension)]
+            updated[(grain, dimension)] = pd.concat(
+                [old[~old['period'].isin(touched)], _aggregate(source, grain, dimension)],
+                ignore_index=True
+            ).sort_values(_rollup_keys(dimension), ignore_index=True)
+
+    return updated
+
+def day_fingerprints(df):
+    """
+    Um hash por dia das linhas (date, type, habit, status).
+    Qualquer edição num dia (status trocado, hábito renomeado, linha nova)
+    muda o hash daquele dia; a soma uint64 não depende da ordem das linhas.
+    """
+    if df.empty:
+        return pd.Series(dtype='uint64')
+    row_hashes = pd.util.hash_pandas_object(df[['date', 'type', 'habit', 'status']], index=False)
+    return row_hashes.groupby(df['date'].dt.normalize().values).sum()
+
+def refresh_rollups(rollups, fingerprints, df):
+    """
+    Sincroniza rollups anteriores (ex: lidas do disco) com um DataFrame novo.
+    Só os dias cujo hash mudou (ou que são novos) são reprocessados; se algum
+    dia sumiu da planilha, ou não há versão anterior, reconstrói tudo.
+    Retorna (rollups, fingerprints) para serem salvos juntos.
+    """
+    new_fingerprints = day_fingerprints(df)
+
+    if rollups is None or fingerprints is None or df.empty:
+        return build_rollups(df), new_fingerprints
+
+    if not fingerprints.index.isin(new_fingerprints.index).all():
+        return build_rollups(df), new_fingerprints
+
+    previous = fingerprints.reindex(new_fingerprints.index)
+    changed_days = new_fingerprints.index[previous.isna() | (previous != new_fingerprints)]
+    if len(changed_days) == 0:
+        return rollups, new_fingerprints
+
+    df_changed = df[df['date'].dt.normalize().isin(changed_days)]
+    return update_rollups(rollups, df_changed), new_fingerprints
+
+def query_rollup(rollups, grain, dimension, start, end, types=None, habits=None):
+    """
+    Lê uma rollup para a janela [start, end] e os filtros dados.
+    Períodos inteiramente dentro da janela vêm prontos da tabela do grão pedido;
+    semanas/meses cortados pela janela são recompostos a partir da tabela diária,
+    então o resultado é exato para qualquer intervalo de datas.
+    Filtrar por hábito só é possível na dimensão 'habit': as rollups por
+    categoria não guardam os hábitos, então habits com dimension='type' é erro.
+    """
+    if habits is not None and dimension != 'habit':
+        raise ValueError(f"habits filter requires dimension='habit', got '{dimension}'")
+
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    def _filter(rollup):
+        mask = pd.Series(True, index=rollup.index)
+        if types is not None:
+            mask &= rollup['type'].isin(types)
+        if habits is not None:
+            mask &= rollup['habit'].isin(habits)
+        return rollup[mask]
+
+    daily = rollups[('day', dimension)]
+    daily = _filter(daily[(daily['period'] >= start) & (daily['period'] <= end)])
+    if grain == 'day':
+        return daily.reset_index(drop=True)
+
+    coarse = rollups[(grain, dimension)]
+    inside = (coarse['period'] >= start) & (_period_end(coarse['period'], grain) <= end)
+    full_periods = _filter(coarse[inside])
+
+    edge_days = daily[~_period_start(daily['period'], grain).isin(full_periods['period'].unique())]
+    if edge_days.empty:
+        # Janela alinhada com semanas/meses inteiros: nada a recompor
+        return full_periods.sort_values(_rollup_keys(dimension), ignore_index=True)
+    partial_periods = _aggregate(edge_days, grain, dimension)
+
+    return pd.concat([full_periods, partial_periods], ignore_index=True).sort_values(
+        _rollup_keys(dimension), ignore_index=True
+    )
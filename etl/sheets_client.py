@@ -0,0 +1,236 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import gspread
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from gspread.http_client import HTTPClient
+from requests.adapters import HTTPAdapter
+
+# --- CONFIGURAÇÃO DE CAMINHOS ---
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+SPREADSHEET_IDS_FILE = PROJECT_ROOT / '.cache' / 'spreadsheet_ids.json'
+
+# Renova o token antes de faltar esse tempo para expirar
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+# Conexões keep-alive mantidas por host (sheets.googleapis.com, googleapis.com/drive)
+HTTP_POOL_SIZE = 10
+REQUEST_TIMEOUT = (10, 60)
+# Abas pedidas que não existem (ex: meses ainda não criados) são reverificadas no máximo a cada 1 hora
+TABS_RECHECK_INTERVAL = 3600
+
+# Falhas de rede que valem nova tentativa: conexão recusada/derrubada, timeout, resposta cortada
+TRANSIENT_NETWORK_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+def _status(err):
+    """
+    Status HTTP de um APIError. err.code vem do corpo JSON e é -1 quando o
+    Google responde HTML (comum em 502/503), então o status da resposta manda.
+    """
+    return err.response.status_code if err.response is not None else err.code
+
+class QuotaAwareHTTPClient(HTTPClient):
+    """
+    HTTPClient do gspread com retry para limites de quota e falhas transitórias.
+    Repete 429/408/5xx (e o 403 'usageLimits' do Drive), timeouts e conexões
+    derrubadas com backoff exponencial + jitter, respeitando o header
+    Retry-After quando o Google envia.
+    Diferente do BackOffHTTPClient do gspread, o contador é local a cada
+    chamada, então é seguro entre threads.
+    """
+    MAX_RETRIES = 5
+    BASE_DELAY = 1.0
+    MAX_DELAY = 64.0
+
+    def __init__(self, auth, session=None):
+        super().__init__(auth, session)
+        self.timeout = REQUEST_TIMEOUT
+
+    def request(self, *args, **kwargs):
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return super().request(*args, **kwargs)
+            except gspread.exceptions.APIError as err:
+                if attempt == self.MAX_RETRIES or not self._should_retry(err):
+                    raise
+                delay = self._backoff_delay(attempt, err.response)
+                reason = f"Quota/erro {_status(err)}"
+            except TRANSIENT_NETWORK_ERRORS as err:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = self._backoff_delay(attempt)
+                reason = f"Falha de rede ({type(err).__name__})"
+            print(f"✕ {reason}, nova tentativa em {delay:.1f}s ({attempt + 1}/{self.MAX_RETRIES})")
+            time.sleep(delay)
+
+    @staticmethod
+    def _should_retry(err):
+        status = _status(err)
+        if status in (408, 429) or status >= 500:
+            return True
+        # Drive responde 403 (e não 429) quando estoura a quota
+        if status == 403:
+            reasons = [e.get('domain') for e in err.error.get('errors', [])]
+            return 'usageLimits' in reasons
+        return False
+
+    def _backoff_delay(self, attempt, response=None):
+        delay = min(self.BASE_DELAY * 2 ** attempt, self.MAX_DELAY) + random.uniform(0, 1)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+class SheetsClientManager:
+    """
+    Cliente gspread de vida longa, compartilhado entre todas as cargas:
+    - credenciais lidas uma única vez e token renovado antes de expirar;
+    - uma única sessão HTTP (keep-alive, pool de conexões) para todas as planilhas;
+    - cache nome -> (ID, abas) da planilha (memória + disco): no caminho quente
+      uma carga é só o values_batch_get, sem busca no Drive nem metadata.
+    """
+
+    def __init__(self, credentials_file, ids_file=SPREADSHEET_IDS_FILE):
+        self._credentials = Credentials.from_service_account_file(
+            str(credentials_file), scopes=gspread.auth.DEFAULT_SCOPES
+        )
+
+        # Sessão simples (sem Bearer) só para a troca de token no endpoint oauth2.
+        # Usar a AuthorizedSession aqui faria ela renovar o token antes de renovar o token.
+        self._token_session = requests.Session()
+        self._token_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._auth_request = Request(self._token_session)
+
+        self._session = AuthorizedSession(self._credentials, auth_request=self._auth_request)
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self._session.mount('https://', adapter)
+
+        self.client = gspread.Client(self._credentials, session=self._session, http_client=QuotaAwareHTTPClient)
+
+        self._token_lock = threading.Lock()
+        self._ids_lock = threading.Lock()
+        self._ids_file = ids_file
+        self._spreadsheets = self._read_ids()
+
+    # --- Token ---
+
+    def ensure_fresh_token(self):
+        """
+        Renova o token de forma proativa, antes da primeira requisição de uma carga,
+        em vez de deixar a renovação cair no meio do download.
+        """
+        with self._token_lock:
+            expiry = self._credentials.expiry
+            now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth usa UTC naive
+            if not self._credentials.valid or expiry is None or expiry - now < TOKEN_REFRESH_MARGIN:
+                self._credentials.refresh(self._auth_request)
+
+    # --- Resolução de planilhas ---
+
+    def _read_ids(self):
+        try:
+            cached = json.loads(self._ids_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        # Formato: {nome: {"id": ..., "sheets": [abas]}}; entradas antigas ou quebradas são ignoradas
+        return {
+            name: entry for name, entry in cached.items()
+            if isinstance(entry, dict) and entry.get('id') and isinstance(entry.get('sheets'), list)
+        }
+
+    def _write_ids(self):
+        try:
+            self._ids_file.parent.mkdir(parents=True, exist_ok=True)
+            self._ids_file.write_text(json.dumps(self._spreadsheets, indent=2), encoding='utf-8')
+        except OSError as e:
+            print(f"✕ Aviso: não foi possível salvar o cache de IDs: {e}")
+
+    def _resolve(self, spreadsheet_name, refresh=False):
+        """
+        Retorna {"id", "sheets"} da planilha. Usa o cache, a não ser que refresh=True:
+        aí relê as abas pelo ID (1 chamada de metadata) e, se o ID não existe mais,
+        volta a buscar pelo nome no Drive.
+        """
+        with self._ids_lock:
+            entry = self._spreadsheets.get(spreadsheet_name)
+        if entry is not None and not refresh:
+            return entry
+
+        metadata = None
+        if entry is not None:
+            try:
+                metadata = self.client.http_client.fetch_sheet_metadata(entry['id'])
+            except gspread.exceptions.APIError as err:
+                if _status(err) != 404:
+                    raise
+                print(f"✕ Aviso: ID em cache de '{spreadsheet_name}' não existe mais, buscando pelo nome.")
+
+        if metadata is None:
+            files = [f for f in self.client.list_spreadsheet_files(title=spreadsheet_name) if f['name'] == spreadsheet_name]
+            if not files:
+                raise gspread.SpreadsheetNotFound(f"Spreadsheet '{spreadsheet_name}' not found")
+            metadata = self.client.http_client.fetch_sheet_metadata(files[0]['id'])
+
+        entry = {
+            'id': metadata['spreadsheetId'],
+            'sheets': [sheet['properties']['title'] for sheet in metadata.get('sheets', [])],
+            'checked_at': time.time(),
+        }
+        with self._ids_lock:
+            self._spreadsheets[spreadsheet_name] = entry
+            self._write_ids()
+        return entry
+
+    def batch_get(self, spreadsheet_name, sheet_titles):
+        """
+        Baixa as abas pedidas numa única requisição.
+        Retorna {aba: valores} só para as abas que existem na planilha.
+        As abas em cache são relidas quando o batch falha (aba renomeada/removida,
+        planilha apagada) ou, no máximo a cada TABS_RECHECK_INTERVAL, quando falta
+        alguma aba pedida (ex: o mês novo ainda não existia na última leitura).
+        """
+        self.ensure_fresh_token()
+        entry = self._resolve(spreadsheet_name)
+        missing_tabs = not set(sheet_titles) <= set(entry['sheets'])
+        if missing_tabs and time.time() - entry.get('checked_at', 0) > TABS_RECHECK_INTERVAL:
+            entry = self._resolve(spreadsheet_name, refresh=True)
+
+        for attempt in range(2):
+            present = [title for title in sheet_titles if title in entry['sheets']]
+            if not present:
+                return {}
+
+            ranges = ["'{}'".format(title.replace("'", "''")) for title in present]
+            try:
+                response = self.client.http_client.values_batch_get(entry['id'], ranges)
+            except gspread.exceptions.APIError as err:
+                if attempt == 1 or _status(err) not in (400, 404):
+                    raise
+                entry = self._resolve(spreadsheet_name, refresh=True)
+                continue
+
+            value_ranges = response.get('valueRanges', [])
+            return {title: value_range.get('values', []) for title, value_range in zip(present, value_ranges)}
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_client_manager(credentials_file):
+    """
+    Retorna o SheetsClientManager do processo, criando-o na primeira chamada.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SheetsClientManager(credentials_file)
+        return _manager
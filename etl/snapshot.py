@@ -0,0 +1,84 @@
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+# --- CONFIGURAÇÃO DE CAMINHOS ---
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+CACHE_DIR = PROJECT_ROOT / '.cache'
+SNAPSHOT_FILE = CACHE_DIR / 'processed.pkl'
+ROLLUPS_FILE = CACHE_DIR / 'rollups.pkl'
+
+# Mesma janela do st.cache_data do main.py (1 hora)
+SNAPSHOT_MAX_AGE = 3600
+
+def snapshot_age(path=SNAPSHOT_FILE):
+    """
+    Idade do arquivo em segundos, ou None se ainda não existe.
+    """
+    if not path.exists():
+        return None
+    return time.time() - path.stat().st_mtime
+
+def _read_pickle(path, max_age):
+    age = snapshot_age(path)
+    if age is None or (max_age is not None and age > max_age):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"✕ Aviso: cache ilegível em '{path.name}' ({e}), ignorando.")
+        return None
+
+def _write_pickle(path, obj):
+    # Escreve num arquivo temporário próprio deste escritor e renomeia, para nunca
+    # deixar um arquivo pela metade: vários processos (sessões do Streamlit, api.server)
+    # podem salvar ao mesmo tempo, e o último os.replace vence inteiro.
+    tmp_name = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'{path.stem}.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, path)
+    except Exception as e:
+        print(f"✕ Aviso: não foi possível salvar '{path.name}': {e}")
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def load_snapshot(max_age=SNAPSHOT_MAX_AGE):
+    """
+    Lê o DataFrame já processado do disco.
+    Retorna None se o arquivo não existir, estiver velho demais ou corrompido,
+    e o chamador cai de volta no pipeline completo (Sheets -> process_data).
+    """
+    return _read_pickle(SNAPSHOT_FILE, max_age)
+
+def save_snapshot(df):
+    """
+    Grava o DataFrame processado para o próximo cold start.
+    """
+    if df is None or df.empty:
+        return
+    _write_pickle(SNAPSHOT_FILE, df)
+
+def load_rollups(max_age=None):
+    """
+    Lê as rollups salvas e o hash de cada dia que as gerou: (rollups, fingerprints).
+    Por padrão sem limite de idade, pois refresh_rollups só reaproveita
+    os dias cujo hash ainda bate com a planilha.
+    Retorna (None, None) se não houver nada utilizável.
+    """
+    saved = _read_pickle(ROLLUPS_FILE, max_age)
+    if not isinstance(saved, tuple) or len(saved) != 2:
+        return None, None
+    return saved
+
+def save_rollups(rollups, fingerprints):
+    if not rollups:
+        return
+    _write_pickle(ROLLUPS_FILE, (rollups, fingerprints))
@@ -2,16 +2,17 @@ import plotly.express as px
 import pandas as pd
 import calendar
 
+from interface.kpis import overall_rate
+
 # --- STANDARD PALETTE ---
 DEFAULT_COLOR = '#00CC96' 
 
-def get_trend_chart(df, color_line=DEFAULT_COLOR):
+def get_trend_chart(daily, color_line=DEFAULT_COLOR):
     """
     Line chart showing the daily success rate with Global Average Line.
+    Expects the output of interface.kpis.trend_series (or /charts/trend).
     Standard Plotly Hover behavior.
     """
-    daily = df.groupby('date')['score'].mean().reset_index()
-    daily['ma_7d'] = daily['score'].rolling(window=7, min_periods=1).mean()
     
     fig = px.line(
         daily, 
@@ -22,7 +23,7 @@ def get_trend_chart(df, color_line=DEFAULT_COLOR):
     )
     
     # Global Average Line
-    avg_score = df['score'].mean()
+    avg_score = overall_rate(daily)
     fig.add_hline(
         y=avg_score, 
         line_dash="dot", 
@@ -40,15 +41,12 @@ def get_trend_chart(df, color_line=DEFAULT_COLOR):
     )
     return fig
 
-def get_multiline_trend_chart(df, dimension='type'):
+def get_multiline_trend_chart(daily, dimension='type'):
     """
     Multi-line trend chart comparing Categories.
+    Expects the output of interface.kpis.trend_series(..., dimension=dimension).
     Standard Plotly Hover behavior.
     """
-    daily = df.groupby(['date', dimension])['score'].mean().reset_index()
-    daily['ma_7d'] = daily.groupby(dimension)['score'].transform(
-        lambda x: x.rolling(window=7, min_periods=1).mean()
-    )
     
     fig = px.line(
         daily, 
@@ -69,11 +67,11 @@ def get_multiline_trend_chart(df, dimension='type'):
     )
     return fig
 
-def get_category_bar_chart(df, color_bar=DEFAULT_COLOR):
+def get_category_bar_chart(cat_stats, color_bar=DEFAULT_COLOR):
     """
     Bar chart comparing performance with GLOBAL AVERAGE LINE.
+    Expects the output of interface.kpis.category_stats (or /charts/category).
     """
-    cat_stats = df.groupby('type')['score'].agg(['mean', 'count']).reset_index()
     cat_stats = cat_stats.sort_values(by='mean', ascending=True)
     cat_stats['label'] = cat_stats.apply(lambda x: f"{x['mean']:.1%} (N={int(x['count'])})", axis=1)
     
@@ -89,7 +87,7 @@ def get_category_bar_chart(df, color_bar=DEFAULT_COLOR):
     fig.update_traces(marker_color=color_bar, textposition='auto')
     
     # --- Global Average Line ---
-    avg_score = df['score'].mean()
+    avg_score = overall_rate(cat_stats)
     fig.add_vline(
         x=avg_score, 
         line_dash="dot", 
@@ -213,20 +211,13 @@ def get_wall_calendar_view(df, score_map, color_range, color_scale='RdYlGn'):
     
     return fig
 
-def get_day_of_week_chart(df, color_bar=DEFAULT_COLOR):
+def get_day_of_week_chart(dow_stats, color_bar=DEFAULT_COLOR):
     """
     Bar chart showing average performance by Day of the Week.
+    Expects the output of interface.kpis.day_of_week_stats (or /charts/day-of-week),
+    sorted from Monday (0) to Sunday (6).
     Useful to find weekly patterns (e.g., "Monday Blue" or "Weak Weekends").
     """
-    df_dow = df.copy()
-    df_dow['day_name'] = df_dow['date'].dt.day_name()
-    df_dow['day_num'] = df_dow['date'].dt.dayofweek
-    
-    # Group and calculate mean
-    dow_stats = df_dow.groupby(['day_num', 'day_name'])['score'].mean().reset_index()
-    
-    # Sort from Monday (0) to Sunday (6)
-    dow_stats = dow_stats.sort_values('day_num')
     
     fig = px.bar(
         dow_stats,
@@ -240,7 +231,7 @@ def get_day_of_week_chart(df, color_bar=DEFAULT_COLOR):
     fig.update_traces(marker_color=color_bar)
     
     # Add global average line for comparison
-    avg_score = df['score'].mean()
+    avg_score = overall_rate(dow_stats)
     fig.add_hline(y=avg_score, line_dash="dot", line_color="gray", annotation_text="Avg", annotation_position="top right")
     
     fig.update_layout(
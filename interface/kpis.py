@@ -1,44 +1,49 @@
 import pandas as pd
 
-def calculate_global_metrics(df):
+def calculate_global_metrics(daily, monthly):
 
     """
-    Calculates KPIs
+    Calculates KPIs from pre-aggregated rollups (see etl.processor.query_rollup).
+    daily: day-grain rollup, monthly: month-grain rollup, both already filtered.
     """
-    if df.empty:
+    if daily.empty:
         return {}
-    
+
     # 1. Counts (Absolute Numbers)
-    # Success (1.0), Failure (0.0). Ignore NaNs (-).
-    success_count = (df['score'] == 1.0).sum()
-    failure_count = (df['score'] == 0.0).sum()
-    
+    # Success (1.0), Failure (0.0). Ignore rests (-).
+    success_count = daily['hits'].sum()
+    failure_count = daily['misses'].sum()
+
     # 2. Success Rate
     # Mathematical definition: Success / (Success + Failure)
     total_attempts = success_count + failure_count
-    global_rate = df['score'].mean() if total_attempts > 0 else 0.0
-    
+    global_rate = success_count / total_attempts if total_attempts > 0 else 0.0
+
     # 3. Perfect Days
-    daily_scores = df.groupby('date')['score'].mean()
-    perfect_days = (daily_scores == 1.0).sum()
-    
+    # A day is perfect when it has at least one hit and no misses
+    per_day = daily.groupby('period')[['hits', 'misses']].sum()
+    perfect_days = ((per_day['hits'] > 0) & (per_day['misses'] == 0)).sum()
+
     # 4. Best & Worst Month
-    monthly_performance = df.groupby('month_name')['score'].mean()
-    
+    # Same-named months of different years are combined, as before
+    by_month = monthly.groupby(monthly['period'].dt.strftime('%B'))[['hits', 'misses']].sum()
+    by_month = by_month[(by_month['hits'] + by_month['misses']) > 0]
+    monthly_performance = by_month['hits'] / (by_month['hits'] + by_month['misses'])
+
     if not monthly_performance.empty:
         best_month_name = monthly_performance.idxmax()
         best_month_rate = monthly_performance.max()
-        
+
         worst_month_name = monthly_performance.idxmin()
         worst_month_rate = monthly_performance.min()
     else:
         best_month_name, worst_month_name = "N/A", "N/A"
         best_month_rate, worst_month_rate = 0.0, 0.0
-        
+
     # 5. Secondary metrics
-    total_days = df['date'].nunique()
-    total_records = len(df)
-    
+    total_days = daily['period'].nunique()
+    total_records = daily[['hits', 'misses', 'rests']].to_numpy().sum()
+
     return {
         "success_rate": global_rate,
         "success_count": success_count,
@@ -50,4 +55,72 @@ def calculate_global_metrics(df):
         "worst_month_rate": worst_month_rate,
         "total_days": total_days,
         "total_records": total_records
-    }
\ No newline at end of file
+    }
+
+# --- CHART DATA (pandas only, shared by interface.charts and the API) ---
+
+def _rate(counts):
+    """
+    Success rate from rollup counts: Hits / (Hits + Misses).
+    NaN where there were only rest days (same as the mean of 'score').
+    """
+    return counts['hits'] / (counts['hits'] + counts['misses'])
+
+def overall_rate(rollup):
+    """
+    Overall success rate of a rollup (NaN if there are no attempts).
+    """
+    return rollup['hits'].sum() / (rollup['hits'].sum() + rollup['misses'].sum())
+
+def trend_series(rollup, dimension=None):
+    """
+    Daily success rate and its 7-day moving average, optionally one line per dimension.
+    Expects a day-grain rollup.
+    """
+    keys = ['period'] if dimension is None else ['period', dimension]
+    daily = rollup.groupby(keys)[['hits', 'misses']].sum().reset_index()
+    daily = daily.rename(columns={'period': 'date'})
+    daily['score'] = _rate(daily)
+
+    if dimension is None:
+        daily['ma_7d'] = daily['score'].rolling(window=7, min_periods=1).mean()
+    else:
+        daily['ma_7d'] = daily.groupby(dimension)['score'].transform(
+            lambda x: x.rolling(window=7, min_periods=1).mean()
+        )
+    return daily
+
+def category_stats(rollup):
+    """
+    Success rate ('mean') and number of attempts ('count') per category.
+    Accepts a rollup of any grain.
+    """
+    cat_stats = rollup.groupby('type')[['hits', 'misses']].sum().reset_index()
+    cat_stats['mean'] = _rate(cat_stats)
+    cat_stats['count'] = cat_stats['hits'] + cat_stats['misses']
+    return cat_stats[['type', 'hits', 'misses', 'mean', 'count']]
+
+def day_of_week_stats(rollup):
+    """
+    Success rate by Day of the Week, Monday (0) to Sunday (6).
+    Expects a day-grain rollup.
+    """
+    df_dow = rollup[['period', 'hits', 'misses']].copy()
+    df_dow['day_name'] = df_dow['period'].dt.day_name()
+    df_dow['day_num'] = df_dow['period'].dt.dayofweek
+
+    dow_stats = df_dow.groupby(['day_num', 'day_name'])[['hits', 'misses']].sum().reset_index()
+    dow_stats['score'] = _rate(dow_stats)
+    return dow_stats.sort_values('day_num')[['day_num', 'day_name', 'hits', 'misses', 'score']]
+
+def chart_aggregates(daily, monthly):
+    """
+    Everything the rollup-based charts need, for one filter selection.
+    Same shapes as the /charts/* endpoints of api.server.
+    """
+    return {
+        'trend': trend_series(daily),
+        'trend_by_type': trend_series(daily, dimension='type'),
+        'category': category_stats(monthly),
+        'day_of_week': day_of_week_stats(daily),
+    }
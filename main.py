@@ -1,22 +1,19 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 
-from etl.connection import load_raw_data
-from etl.processor import process_data
-from interface.kpis import calculate_global_metrics
-from interface.charts import (
-    get_trend_chart, 
-    get_category_bar_chart, 
-    get_productivity_heatmap, 
-    get_wall_calendar_view,
-    get_multiline_trend_chart,
-    get_day_of_week_chart,
-    get_correlation_heatmap
-)
+from etl.pipeline import load_pipeline
+from etl.processor import query_rollup
+from etl.snapshot import SNAPSHOT_MAX_AGE
+from interface.kpis import calculate_global_metrics, chart_aggregates
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Habit Tracker", page_icon="📈", layout="wide")
 PRIMARY_COLOR = '#00CC96' 
+# e.g. http://127.0.0.1:8765 -> read data from the local API instead of loading it here
+API_URL = os.environ.get('HABITS_API_URL')
 
 # --- CSS ---
 st.markdown("""
@@ -80,37 +77,56 @@ def render_scoring_widget(key_suffix, total_habits_ref):
         
     return score_map, [min_score, max_score], scale
 
+def get_filter_options(df):
+    """
+    Sidebar choices from the processed rows (same shape as api.client.fetch_meta).
+    """
+    return {
+        'min_date': df['date'].min().date(),
+        'max_date': df['date'].max().date(),
+        'types': sorted(df['type'].unique()),
+        'habits': df[['type', 'habit']].drop_duplicates().sort_values(['type', 'habit']),
+    }
+
 def main():
     st.title("Habit Tracker")
     
     # --- LOAD DATA ---
-    @st.cache_data(ttl=3600)
+    @st.cache_data(ttl=SNAPSHOT_MAX_AGE)
     def get_data_pipeline():
-        raw_list = load_raw_data()
-        if raw_list:
-            return process_data(raw_list)
-        return None
+        return load_pipeline()
 
     with st.spinner("Loading..."):
-        df = get_data_pipeline()
+        if API_URL:
+            # Shared aggregate service (api/server.py): the sidebar comes from /meta and
+            # the per-row data is only downloaded after the KPI row
+            from api.client import fetch_meta, fetch_records, fetch_kpis, fetch_chart_data
+            options = fetch_meta(API_URL)
+        else:
+            df, rollups, loaded_at = get_data_pipeline()
+            # The cache TTL counts from when the cache was filled, which may have been
+            # from an older snapshot: never serve data fetched more than an hour ago
+            if loaded_at is not None and time.time() - loaded_at > SNAPSHOT_MAX_AGE:
+                get_data_pipeline.clear()
+                df, rollups, loaded_at = get_data_pipeline()
+            options = get_filter_options(df) if df is not None and not df.empty else None
 
-    if df is not None and not df.empty:
-        
-        total_source_habits = df['habit'].nunique()
+    if options is not None:
         
         # --- SIDEBAR FILTERS ---
         st.sidebar.header("Filter Data")
         
-        min_date = df['date'].min().date()
-        max_date = df['date'].max().date()
+        min_date = options['min_date']
+        max_date = options['max_date']
         date_range = st.sidebar.date_input("Period", value=(min_date, max_date), min_value=min_date, max_value=max_date, key='date_range')
         st.sidebar.markdown("---")
         
         st.sidebar.caption("Categories")
-        all_types = sorted(df['type'].unique())
+        all_types = options['types']
         selected_types = st.sidebar.pills("Select categories:", all_types, default=all_types, selection_mode="multi", label_visibility="collapsed", key='cat_filter')
         
-        available_habits = sorted(df[df['type'].isin(selected_types or [])]['habit'].unique())
+        habit_pairs = options['habits']
+        available_habits = sorted(habit_pairs[habit_pairs['type'].isin(selected_types or [])]['habit'].unique())
         
         with st.sidebar.expander("Detailed Habit Filter", expanded=False):
             if st.button("Select All Habits"):
@@ -122,17 +138,22 @@ def main():
             st.warning("Please select at least one Category.")
             return
 
-        mask_date = (df['date'].dt.date >= date_range[0]) & (df['date'].dt.date <= date_range[1])
-        mask_type = df['type'].isin(selected_types)
-        mask_habit = df['habit'].isin(selected_habits)
-        
-        df_filtered = df[mask_date & mask_type & mask_habit].copy()
-        
-        if df_filtered.empty:
+        if not selected_habits:
             st.warning("No data visible.")
             return
 
-        total_filtered_habits = df_filtered['habit'].nunique()
+        # Category rollups are enough unless the habit filter narrows the selection
+        narrowed_habits = not set(selected_habits) >= set(available_habits)
+        rollup_filter = dict(
+            start=date_range[0], 
+            end=date_range[1], 
+            types=selected_types, 
+            habits=selected_habits if narrowed_habits else None
+        )
+        if not API_URL:
+            rollup_dim = 'habit' if narrowed_habits else 'type'
+            daily_rollup = query_rollup(rollups, 'day', rollup_dim, **rollup_filter)
+            monthly_rollup = query_rollup(rollups, 'month', rollup_dim, **rollup_filter)
         
         st.sidebar.markdown("---")
         if st.sidebar.button("Reset All Filters"):
@@ -142,7 +163,19 @@ def main():
             st.rerun()
 
         # --- KPI SECTION ---
-        metrics = calculate_global_metrics(df_filtered)
+        if API_URL:
+            metrics = fetch_kpis(API_URL, **rollup_filter)
+            if metrics is None:
+                st.error("Connection Error.")
+                return
+        else:
+            metrics = calculate_global_metrics(daily_rollup, monthly_rollup)
+
+        # Empty metrics: nothing recorded for the selected period/categories/habits
+        if not metrics:
+            st.warning("No data visible.")
+            return
+
         k1, k2, k3, k4 = st.columns(4)
         
         k1.metric(
@@ -175,6 +208,34 @@ def main():
         
         st.markdown("---")
 
+        # Plotly is only imported here, after the KPI row is already on screen
+        from interface.charts import (
+            get_trend_chart, 
+            get_category_bar_chart, 
+            get_productivity_heatmap, 
+            get_wall_calendar_view,
+            get_multiline_trend_chart,
+            get_day_of_week_chart,
+            get_correlation_heatmap
+        )
+
+        if API_URL:
+            chart_data = fetch_chart_data(API_URL, **rollup_filter)
+            df = fetch_records(API_URL)
+            if chart_data is None or df is None:
+                st.error("Connection Error.")
+                return
+        else:
+            chart_data = chart_aggregates(daily_rollup, monthly_rollup)
+
+        # Per-row data for the calendar, heatmap, correlation and data tab
+        mask_date = (df['date'].dt.date >= date_range[0]) & (df['date'].dt.date <= date_range[1])
+        mask_type = df['type'].isin(selected_types)
+        mask_habit = df['habit'].isin(selected_habits)
+        
+        df_filtered = df[mask_date & mask_type & mask_habit].copy()
+        total_filtered_habits = df_filtered['habit'].nunique()
+
         # --- TABS ---
         tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Calendar", "Patterns", "Data"])
         
@@ -184,9 +245,9 @@ def main():
             view_option = st.radio("Group by:", ["Global", "Category"], horizontal=True, label_visibility="collapsed")
             
             if view_option == "Global":
-                fig_trend = get_trend_chart(df_filtered, color_line=PRIMARY_COLOR)
+                fig_trend = get_trend_chart(chart_data['trend'], color_line=PRIMARY_COLOR)
             else:
-                fig_trend = get_multiline_trend_chart(df_filtered, dimension='type')
+                fig_trend = get_multiline_trend_chart(chart_data['trend_by_type'], dimension='type')
 
             st.plotly_chart(fig_trend, use_container_width=True)
             with st.expander("ℹ️ About this chart"):
@@ -195,7 +256,7 @@ def main():
             st.markdown("---")
             
             st.markdown("##### Performance by Category")
-            fig_cat = get_category_bar_chart(df_filtered, color_bar=PRIMARY_COLOR)
+            fig_cat = get_category_bar_chart(chart_data['category'], color_bar=PRIMARY_COLOR)
             fig_cat.update_layout(height=400) 
             st.plotly_chart(fig_cat, use_container_width=True)
             with st.expander("ℹ️ About this chart"):
@@ -225,7 +286,7 @@ def main():
             # 2. Weekly Rhythm
             st.markdown("##### Weekly Rhythm")
             st.caption("Average success rate by Day of the Week.")
-            fig_dow = get_day_of_week_chart(df_filtered, color_bar=PRIMARY_COLOR)
+            fig_dow = get_day_of_week_chart(chart_data['day_of_week'], color_bar=PRIMARY_COLOR)
             st.plotly_chart(fig_dow, use_container_width=True)
             with st.expander("ℹ️ About this chart"):
                 st.markdown("Discover your strongest and weakest days of the week. The line indicates the overall average.")
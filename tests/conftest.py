@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from etl.processor import process_data
+
+HABITS = [('Health', 'run'), ('Health', 'sleep'), ('Work', 'deep'), ('Study', 'read'), ('Study', 'anki')]
+
+def make_raw_month(year, month, rng):
+    """
+    One worksheet as load_raw_data returns it: type, habit, one column per day (dd/mm/yyyy).
+    """
+    days = pd.date_range(f'{year}-{month:02d}-01', periods=pd.Period(f'{year}-{month:02d}').days_in_month)
+    data = {'type': [h[0] for h in HABITS], 'habit': [h[1] for h in HABITS]}
+    for day in days:
+        data[day.strftime('%d/%m/%Y')] = rng.choice(['1', '0', '-', ''], size=len(HABITS), p=[.5, .3, .15, .05])
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(42)
+    return process_data([make_raw_month(2025, month, rng) for month in range(1, 13)])
@@ -0,0 +1,136 @@
+import datetime
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from api import client
+from api.server import ROUTES, AggregateStore, create_server
+from etl.processor import build_rollups, query_rollup
+from interface.kpis import calculate_global_metrics, chart_aggregates
+
+@pytest.fixture
+def api(df):
+    calls = []
+
+    def loader(max_age):
+        calls.append(max_age)
+        return df, build_rollups(df), 0.0
+
+    store = AggregateStore(loader=loader)
+    store.refresh()
+    server = create_server('127.0.0.1', 0, store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client._cache.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}", store, calls
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize('start,end,habits', [
+    (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28), None),
+    (datetime.date(2025, 1, 6), datetime.date(2025, 1, 19), ['run', 'read']),
+    (datetime.date(2025, 2, 13), datetime.date(2025, 10, 4), None),
+])
+def test_api_aggregates_match_local(api, df, start, end, habits):
+    base_url, _, _ = api
+    filters = dict(start=start, end=end, types=['Health', 'Study'], habits=habits)
+    dimension = 'habit' if habits else 'type'
+    rollups = build_rollups(df)
+    daily = query_rollup(rollups, 'day', dimension, **filters)
+    monthly = query_rollup(rollups, 'month', dimension, **filters)
+
+    expected_metrics = calculate_global_metrics(daily, monthly)
+    metrics = client.fetch_kpis(base_url, **filters)
+    assert metrics.keys() == expected_metrics.keys()
+    for key, value in expected_metrics.items():
+        assert metrics[key] == (value if isinstance(value, str) else pytest.approx(value)), key
+
+    expected_charts = chart_aggregates(daily, monthly)
+    charts = client.fetch_chart_data(base_url, **filters)
+    for key, frame in expected_charts.items():
+        pd.testing.assert_frame_equal(charts[key], frame.reset_index(drop=True), check_dtype=False, obj=key)
+
+def test_meta_has_the_sidebar_options(api, df):
+    base_url, _, _ = api
+    meta = client.fetch_meta(base_url)
+    assert meta['min_date'] == df['date'].min().date()
+    assert meta['max_date'] == df['date'].max().date()
+    assert meta['types'] == sorted(df['type'].unique())
+    expected = df[['type', 'habit']].drop_duplicates().sort_values(['type', 'habit'])
+    pd.testing.assert_frame_equal(meta['habits'], expected.reset_index(drop=True))
+
+def test_records_round_trip_and_conditional_get(api, df):
+    base_url, _, _ = api
+    records = client.fetch_records(base_url)
+    pd.testing.assert_frame_equal(records, df.reset_index(drop=True), check_dtype=False)
+
+    url = f"{base_url}/records"
+    request = urllib.request.Request(url, headers={'If-None-Match': client._cache[url][0]})
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(request)
+    assert excinfo.value.code == 304
+
+def test_client_cache_keeps_only_recent_urls(api, monkeypatch):
+    base_url, _, _ = api
+    monkeypatch.setattr(client, 'CLIENT_CACHE_SIZE', 3)
+    for day in range(1, 6):
+        client.fetch_kpis(base_url, start=datetime.date(2025, 3, day), end=datetime.date(2025, 3, 31))
+    assert len(client._cache) == 3
+    assert all('start=2025-03-0' in url for url in client._cache)
+    assert 'start=2025-03-05' in next(reversed(client._cache))
+
+def test_names_with_commas_are_not_split(api, df):
+    base_url, store, _ = api
+    renamed = df.replace({'type': {'Health': 'Health, body'}, 'habit': {'run': 'run, 5k'}})
+    store._loader = lambda max_age: (renamed, build_rollups(renamed), 0.0)
+    store.refresh()
+
+    filters = dict(start=datetime.date(2025, 1, 1), end=datetime.date(2025, 12, 31),
+                   types=['Health, body'], habits=['run, 5k'])
+    metrics = client.fetch_kpis(base_url, **filters)
+    mask = (renamed['type'] == 'Health, body') & (renamed['habit'] == 'run, 5k')
+    assert metrics['total_records'] == mask.sum() > 0
+
+def test_habit_filter_on_category_rollup_returns_400(api):
+    base_url, _, _ = api
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"{base_url}/rollups/month/type?habits=run")
+    assert excinfo.value.code == 400
+
+def test_unexpected_errors_return_json_500(api, monkeypatch):
+    base_url, _, _ = api
+
+    def broken(state, query):
+        raise RuntimeError("boom")
+    monkeypatch.setitem(ROUTES, '/kpis', broken)
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"{base_url}/kpis?start=2025-03-01")
+    assert excinfo.value.code == 500
+    assert 'error' in json.loads(excinfo.value.read())
+
+def test_background_refresh_skips_snapshot(df):
+    calls = []
+
+    def loader(max_age):
+        calls.append(max_age)
+        return df, build_rollups(df), 0.0
+
+    store = AggregateStore(loader=loader, refresh_interval=0.01)
+    store.start_background_refresh()
+    try:
+        deadline = time.time() + 5
+        while not calls and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop_background_refresh(timeout=5)
+    assert calls and calls[0] == 0
+
+    reloads = len(calls)
+    time.sleep(0.1)
+    assert len(calls) == reloads
+    assert not any(t.name == 'aggregate-refresh' for t in threading.enumerate())
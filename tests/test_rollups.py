@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.processor import build_rollups, query_rollup, refresh_rollups, day_fingerprints
+from interface.kpis import calculate_global_metrics, category_stats, day_of_week_stats
+
+def raw_metrics(df):
+    """
+    KPIs computed straight from the raw rows (the pre-rollup implementation).
+    """
+    monthly = df.groupby('month_name')['score'].mean()
+    return {
+        'success_rate': df['score'].mean(),
+        'success_count': (df['score'] == 1.0).sum(),
+        'failure_count': (df['score'] == 0.0).sum(),
+        'perfect_days': (df.groupby('date')['score'].mean() == 1.0).sum(),
+        'best_month': monthly.idxmax(),
+        'best_month_rate': monthly.max(),
+        'worst_month': monthly.idxmin(),
+        'worst_month_rate': monthly.min(),
+        'total_days': df['date'].nunique(),
+        'total_records': len(df),
+    }
+
+WINDOWS = [
+    ('2025-01-01', '2025-12-31'),  # full range, aligned with months
+    ('2025-02-01', '2025-02-28'),  # one whole month
+    ('2025-01-06', '2025-01-19'),  # two whole ISO weeks
+    ('2025-02-13', '2025-10-04'),  # unaligned on both ends
+    ('2025-07-10', '2025-07-10'),  # single day
+]
+
+FILTERS = [
+    ('type', ['Health', 'Study', 'Work'], None),
+    ('type', ['Health', 'Study'], None),
+    ('habit', ['Health', 'Study'], ['run', 'read', 'anki']),
+]
+
+@pytest.mark.parametrize('start,end', WINDOWS)
+@pytest.mark.parametrize('dimension,types,habits', FILTERS)
+def test_rollup_queries_match_raw_rows(df, start, end, dimension, types, habits):
+    rollups = build_rollups(df)
+    mask = (df['date'] >= start) & (df['date'] <= end) & df['type'].isin(types)
+    if habits is not None:
+        mask &= df['habit'].isin(habits)
+    df_filtered = df[mask]
+
+    filters = dict(start=start, end=end, types=types, habits=habits)
+    daily = query_rollup(rollups, 'day', dimension, **filters)
+    weekly = query_rollup(rollups, 'week', dimension, **filters)
+    monthly = query_rollup(rollups, 'month', dimension, **filters)
+
+    for rollup in (daily, weekly, monthly):
+        assert pd.api.types.is_datetime64_any_dtype(rollup['period'])
+        assert rollup['hits'].sum() == (df_filtered['status'] == '1').sum()
+        assert rollup['misses'].sum() == (df_filtered['status'] == '0').sum()
+        assert rollup[['hits', 'misses', 'rests']].to_numpy().sum() == len(df_filtered)
+
+    metrics = calculate_global_metrics(daily, monthly)
+    expected = raw_metrics(df_filtered)
+    assert metrics.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert metrics[key] == value, key
+        else:
+            assert metrics[key] == pytest.approx(value, nan_ok=True), key
+
+    cat = category_stats(monthly).set_index('type')
+    raw_cat = df_filtered.groupby('type')['score'].agg(['mean', 'count'])
+    np.testing.assert_allclose(cat.loc[raw_cat.index, 'mean'], raw_cat['mean'])
+    np.testing.assert_array_equal(cat.loc[raw_cat.index, 'count'], raw_cat['count'])
+
+    dow = day_of_week_stats(daily).set_index('day_num')['score']
+    raw_dow = df_filtered.groupby(df_filtered['date'].dt.dayofweek)['score'].mean()
+    np.testing.assert_allclose(dow.loc[raw_dow.index], raw_dow)
+
+def assert_rollups_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        pd.testing.assert_frame_equal(
+            actual[key].reset_index(drop=True), expected[key].reset_index(drop=True), check_dtype=False, obj=str(key)
+        )
+
+def test_refresh_appends_new_days(df):
+    old = df[df['date'] < '2025-07-10']
+    rollups, fingerprints = refresh_rollups(None, None, old)
+
+    refreshed, _ = refresh_rollups(rollups, fingerprints, df)
+    assert_rollups_equal(refreshed, build_rollups(df))
+
+def test_refresh_picks_up_back_dated_edits(df):
+    rollups, fingerprints = refresh_rollups(None, None, df)
+
+    edited = df.copy()
+    # Swap a hit and a miss between two habits on an old day (totals unchanged)
+    day = edited[edited['date'] == '2025-03-05']
+    hit = day.index[day['status'] == '1'][0]
+    miss = day.index[day['status'] == '0'][0]
+    edited.loc[[hit, miss], 'status'] = ['0', '1']
+    # Rename a habit on another old day
+    edited.loc[(edited['date'] == '2025-04-02') & (edited['habit'] == 'run'), 'habit'] = 'jog'
+
+    refreshed, new_fingerprints = refresh_rollups(rollups, fingerprints, edited)
+    assert_rollups_equal(refreshed, build_rollups(edited))
+    pd.testing.assert_series_equal(new_fingerprints, day_fingerprints(edited))
+
+def test_refresh_rebuilds_when_days_disappear(df):
+    rollups, fingerprints = refresh_rollups(None, None, df)
+
+    truncated = df[df['date'] != '2025-06-15']
+    refreshed, _ = refresh_rollups(rollups, fingerprints, truncated)
+    assert_rollups_equal(refreshed, build_rollups(truncated))
+
+def test_habit_filter_on_category_rollup_is_rejected(df):
+    rollups = build_rollups(df)
+    with pytest.raises(ValueError):
+        query_rollup(rollups, 'month', 'type', '2025-01-01', '2025-12-31', habits=['run'])
@@ -0,0 +1,141 @@
+import json
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+import requests
+
+pytest.importorskip('gspread')
+serialization = pytest.importorskip('cryptography.hazmat.primitives.serialization')
+rsa = pytest.importorskip('cryptography.hazmat.primitives.asymmetric.rsa')
+
+from etl import sheets_client
+from etl.sheets_client import SheetsClientManager
+
+SHEETS = {'jan': [['type', 'habit', '01/01/2025'], ['Health', 'run', '1']],
+          'feb': [['type', 'habit', '01/02/2025'], ['Health', 'run', '0']]}
+
+@pytest.fixture
+def credentials_file(tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    path = tmp_path / 'credentials.json'
+    path.write_text(json.dumps({
+        'type': 'service_account', 'project_id': 'p', 'private_key_id': 'k', 'private_key': pem,
+        'client_email': 'sa@p.iam.gserviceaccount.com', 'client_id': '1',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+    }))
+    return path
+
+@pytest.fixture
+def google(monkeypatch):
+    """
+    Fake Google endpoints behind requests' transport; records every request.
+    """
+    state = {'calls': [], 'sheets': dict(SHEETS), 'fail_batch': 0, 'batch_faults': []}
+
+    def send(adapter, request, **kwargs):
+        url = urlsplit(request.url)
+        state['calls'].append((url.netloc + url.path, request.headers.get('Authorization')))
+        status, body = 200, {}
+        if url.path == '/token':
+            body = {'access_token': 'tok', 'expires_in': 3600}
+        elif url.path == '/drive/v3/files':
+            body = {'files': [{'id': 'abc', 'name': 'habits-2025'}]}
+        elif url.path == '/v4/spreadsheets/abc':
+            body = {'spreadsheetId': 'abc', 'sheets': [{'properties': {'title': t}} for t in state['sheets']]}
+        elif url.path == '/v4/spreadsheets/abc/values:batchGet':
+            fault = state['batch_faults'].pop(0) if state['batch_faults'] else None
+            if fault == 'reset':
+                raise requests.exceptions.ConnectionError('Connection reset by peer')
+            if fault == 'html503':
+                response = requests.Response()
+                response.status_code = 503
+                response._content = b'<html><body>Service Unavailable</body></html>'
+                response.headers['Content-Type'] = 'text/html'
+                response.url = request.url
+                response.request = request
+                return response
+            if state['fail_batch']:
+                state['fail_batch'] -= 1
+                status, body = 400, {'error': {'code': 400, 'message': 'Unable to parse range', 'status': 'INVALID_ARGUMENT'}}
+            else:
+                ranges = parse_qs(url.query)['ranges']
+                body = {'valueRanges': [{'values': state['sheets'][r.strip("'")]} for r in ranges]}
+        else:
+            status, body = 404, {'error': {'code': 404, 'message': 'nope', 'status': 'NOT_FOUND'}}
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, 'send', send)
+    return state
+
+def paths(calls):
+    # Newer google-auth looks up the service account's allowed locations on its own; not ours to count
+    return [path.split('/', 1)[1] for path, _ in calls if not path.startswith('iamcredentials.')]
+
+def test_first_load_resolves_once_then_only_fetches_values(credentials_file, tmp_path, google):
+    manager = SheetsClientManager(credentials_file, ids_file=tmp_path / 'ids.json')
+
+    values = manager.batch_get('habits-2025', ['jan', 'feb'])
+    assert values == SHEETS
+    assert paths(google['calls']) == ['token', 'drive/v3/files', 'v4/spreadsheets/abc', 'v4/spreadsheets/abc/values:batchGet']
+    # The token exchange goes out without a Bearer header, exactly once
+    token_calls = [auth for path, auth in google['calls'] if path == 'oauth2.googleapis.com/token']
+    assert token_calls == [None]
+
+    google['calls'].clear()
+    manager.batch_get('habits-2025', ['jan', 'feb'])
+    assert paths(google['calls']) == ['v4/spreadsheets/abc/values:batchGet']
+
+    # A new process reuses the ID and tabs saved on disk
+    google['calls'].clear()
+    SheetsClientManager(credentials_file, ids_file=tmp_path / 'ids.json').batch_get('habits-2025', ['jan', 'feb'])
+    assert paths(google['calls']) == ['token', 'v4/spreadsheets/abc/values:batchGet']
+
+def test_failed_batch_rereads_tabs_and_retries(credentials_file, tmp_path, google):
+    manager = SheetsClientManager(credentials_file, ids_file=tmp_path / 'ids.json')
+    manager.batch_get('habits-2025', ['jan', 'feb'])
+
+    # 'feb' was deleted from the spreadsheet after it was cached
+    del google['sheets']['feb']
+    google['fail_batch'] = 1
+    google['calls'].clear()
+    assert manager.batch_get('habits-2025', ['jan', 'feb']) == {'jan': SHEETS['jan']}
+    assert paths(google['calls']) == [
+        'v4/spreadsheets/abc/values:batchGet', 'v4/spreadsheets/abc', 'v4/spreadsheets/abc/values:batchGet'
+    ]
+
+def test_missing_tabs_are_rechecked_at_most_once_per_interval(credentials_file, tmp_path, google, monkeypatch):
+    manager = SheetsClientManager(credentials_file, ids_file=tmp_path / 'ids.json')
+    manager.batch_get('habits-2025', ['jan', 'feb', 'mar'])
+
+    google['calls'].clear()
+    manager.batch_get('habits-2025', ['jan', 'feb', 'mar'])
+    assert paths(google['calls']) == ['v4/spreadsheets/abc/values:batchGet']
+
+    google['sheets']['mar'] = [['type', 'habit', '01/03/2025'], ['Health', 'run', '1']]
+    monkeypatch.setattr(sheets_client, 'TABS_RECHECK_INTERVAL', -1)
+    google['calls'].clear()
+    assert 'mar' in manager.batch_get('habits-2025', ['jan', 'feb', 'mar'])
+    assert paths(google['calls']) == ['v4/spreadsheets/abc', 'v4/spreadsheets/abc/values:batchGet']
+
+@pytest.mark.parametrize('fault', ['html503', 'reset'])
+def test_transient_failures_are_retried_with_backoff(credentials_file, tmp_path, google, monkeypatch, fault):
+    manager = SheetsClientManager(credentials_file, ids_file=tmp_path / 'ids.json')
+    manager.batch_get('habits-2025', ['jan', 'feb'])
+
+    sleeps = []
+    monkeypatch.setattr(sheets_client.time, 'sleep', sleeps.append)
+    google['batch_faults'] = [fault, fault]
+    google['calls'].clear()
+    assert manager.batch_get('habits-2025', ['jan', 'feb']) == SHEETS
+    assert paths(google['calls']) == ['v4/spreadsheets/abc/values:batchGet'] * 3
+    assert len(sleeps) == 2 and sleeps[0] >= 1.0 and sleeps[1] >= 2.0
@@ -0,0 +1,18 @@
+import pickle
+import threading
+
+from etl import snapshot
+
+def test_concurrent_writers_never_leave_a_partial_file(tmp_path):
+    path = tmp_path / 'processed.pkl'
+    payloads = [list(range(i, i + 200_000)) for i in range(8)]
+
+    threads = [threading.Thread(target=snapshot._write_pickle, args=(path, p)) for p in payloads]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(path, 'rb') as f:
+        assert pickle.load(f) in payloads
+    assert list(tmp_path.glob('*.tmp')) == []
@@ -0,0 +1,104 @@
+"""
+Import-time harness for the dashboard cold start.
+
+Each module is imported in a fresh interpreter (so nothing is already cached
+in sys.modules) and the wall time is measured. The script exits with code 1 if
+any module is over its budget or if the cold path pulls in a heavy library
+that should only be loaded on first use (plotly, gspread).
+
+Usage:
+    python tools/import_budget.py
+    python tools/import_budget.py --repeat 7 --scale 2.0
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Budgets in seconds. The cold path is everything main.py imports before the KPI row.
+BUDGETS = {
+    'etl.connection': 0.05,
+    'etl.snapshot': 0.05,
+    'etl.processor': 1.0,
+    'etl.pipeline': 1.0,
+    'interface.kpis': 1.0,
+}
+
+# Reference points only (not enforced): what the cold path is avoiding
+REFERENCE_MODULES = ['interface.charts', 'gspread']
+
+# Must NOT be in sys.modules after importing the cold path
+DEFERRED_MODULES = ['plotly', 'gspread']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=5):
+    """
+    Median import time (seconds) over `repeat` fresh interpreters,
+    plus the deferred modules that got loaded along the way.
+    """
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to import {module}: {result.stderr.strip().splitlines()[-1]}")
+        payload = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(payload['elapsed'])
+        loaded = payload['loaded']
+    return statistics.median(samples), loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets for the cold start path.")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every budget (slow CI machines).")
+    args = parser.parse_args()
+
+    failed = False
+
+    print(f"{'module':<22}{'median':>10}{'budget':>10}  status")
+    for module, budget in BUDGETS.items():
+        limit = budget * args.scale
+        try:
+            elapsed, loaded = measure_import(module, args.repeat)
+        except RuntimeError as e:
+            print(f"{module:<22}{'-':>10}{limit:>9.3f}s  ERROR ({e})")
+            failed = True
+            continue
+
+        status = "ok"
+        if elapsed > limit:
+            status = "OVER BUDGET"
+            failed = True
+        if loaded:
+            status += f" (eagerly loaded: {', '.join(loaded)})"
+            failed = True
+        print(f"{module:<22}{elapsed:>9.3f}s{limit:>9.3f}s  {status}")
+
+    print()
+    for module in REFERENCE_MODULES:
+        try:
+            elapsed, _ = measure_import(module, args.repeat)
+            print(f"{module:<22}{elapsed:>9.3f}s  (reference, deferred)")
+        except RuntimeError as e:
+            print(f"{module:<22}{'-':>10}  (reference unavailable: {e})")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())